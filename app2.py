@@ -1,11 +1,42 @@
 import streamlit as st
 import openai
 from llama_index.llms.openai import OpenAI
-from llama_index.core import VectorStoreIndex, SimpleDirectoryReader, Settings
+from llama_index.embeddings.openai import OpenAIEmbedding
+from llama_index.core import (
+  VectorStoreIndex,
+  SimpleDirectoryReader,
+  Settings,
+  StorageContext,
+  load_index_from_storage,
+)
 from llama_index.core.node_parser import SimpleNodeParser
+from llama_index.core.schema import MetadataMode
+from llama_index.vector_stores.faiss import FaissVectorStore
+from pydantic import PrivateAttr
+import diskcache
+import functools
+import faiss
+import numpy as np
+import hashlib
+import json
 import re
 import os
 
+DATA_DIR = "./data"
+EMBED_MODEL = "text-embedding-3-small"
+EMBED_BATCH_SIZE = 256  # chunks per embeddings request
+QUERY_CACHE_SIZE = 1024
+EMBED_DIM = 1536
+HNSW_M = 32  # graph neighbours per vector
+HNSW_EF_CONSTRUCTION = 200
+HNSW_EF_SEARCH = 64
+# Vectors from different models are not comparable, so each gets its own index
+INDEX_DIR = os.path.join(DATA_DIR, ".index", f"{EMBED_MODEL}-hnsw-sq8")
+INDEX_MANIFEST = os.path.join(INDEX_DIR, "documents.json")
+EMBEDDING_CACHE_DIR = os.path.join(DATA_DIR, ".embeddings")
+# The vision app keeps its SQLite result cache in ./data; it is not a document
+CACHE_DB_SUFFIXES = (".db", ".db-wal", ".db-shm")
+
 # Set up the Streamlit page configuration
 st.set_page_config(
   page_title="Rag Based Newspaper Bot",
@@ -34,21 +65,64 @@ if "messages" not in st.session_state:
 if "references" not in st.session_state:
   st.session_state.references = []
 
-@st.cache_resource(show_spinner=False)
+class CachedOpenAIEmbedding(OpenAIEmbedding):
+  """OpenAIEmbedding that reuses on-disk embeddings keyed by chunk content hash
+  and keeps recent query embeddings in memory"""
+  _cache: diskcache.Cache = PrivateAttr()
+  _query_embeddings = PrivateAttr()
+
+  def __init__(self, cache_dir=EMBEDDING_CACHE_DIR, **kwargs):
+      super().__init__(**kwargs)
+      self._cache = diskcache.Cache(cache_dir)
+      self._query_embeddings = functools.lru_cache(maxsize=QUERY_CACHE_SIZE)(
+          super()._get_query_embedding
+      )
+
+  def _get_query_embedding(self, query):
+      return self._query_embeddings(" ".join(query.split()))
+
+  def _cache_key(self, text):
+      return f"{self.model_name}:{hashlib.sha256(text.encode('utf-8')).hexdigest()}"
+
+  def _get_text_embedding(self, text):
+      return self._get_text_embeddings([text])[0]
+
+  def _get_text_embeddings(self, texts):
+      keys = [self._cache_key(text) for text in texts]
+      # Read each key once and keep results in memory: the cache evicts
+      # entries once it reaches its size limit, even between two reads
+      found = {key: self._cache.get(key) for key in keys}
+      missing = {key: text for key, text in zip(keys, texts) if found[key] is None}
+      if missing:
+          embeddings = super()._get_text_embeddings(list(missing.values()))
+          for key, embedding in zip(missing, embeddings):
+              self._cache[key] = embedding
+              found[key] = embedding
+      return [found[key] for key in keys]
+
+def document_manifest():
+  """Map every document in ./data to its [mtime, size]"""
+  manifest = {}
+  for root, dirs, files in os.walk(DATA_DIR):
+      dirs[:] = [d for d in dirs if not d.startswith(".")]
+      for name in files:
+          if name.startswith(".") or name.endswith(CACHE_DB_SUFFIXES):
+              continue
+          path = os.path.join(root, name)
+          stat = os.stat(path)
+          manifest[os.path.relpath(path, DATA_DIR)] = [stat.st_mtime, stat.st_size]
+  return manifest
+
+def index_is_current(manifest):
+  """True when the persisted index was built from exactly these documents"""
+  if not os.path.exists(INDEX_MANIFEST):
+      return False
+  with open(INDEX_MANIFEST, encoding="utf-8") as f:
+      return json.load(f) == manifest
+
+@st.cache_resource(show_spinner="Initializing index…")
 def load_data():
   try:
-      node_parser = SimpleNodeParser.from_defaults(
-          chunk_size=2048,  # Increase chunk size to ensure more content is read
-          chunk_overlap=100,  # Adjust overlap to ensure continuity
-      )
-      
-      reader = SimpleDirectoryReader(
-          input_dir="./data",
-          recursive=True,
-          filename_as_id=True
-      )
-      docs = reader.load_data()
-      
       system_prompt = """You are an authoritative expert on Newspapers in Gujrati 
       Your responses should be:
       1. Comprehensive and detailed
@@ -73,11 +147,67 @@ def load_data():
           system_prompt=system_prompt,
       )
       
-      index = VectorStoreIndex.from_documents(
-          docs,
-          node_parser=node_parser,
+      Settings.embed_model = CachedOpenAIEmbedding(
+          model=EMBED_MODEL,
+          embed_batch_size=EMBED_BATCH_SIZE,
+      )
+
+      # Snapshot before reading so edits made during a build trigger a rebuild
+      manifest = document_manifest()
+      if index_is_current(manifest):
+          vector_store = FaissVectorStore.from_persist_dir(INDEX_DIR)
+          vector_store.client.hnsw.efSearch = HNSW_EF_SEARCH
+          storage_context = StorageContext.from_defaults(
+              vector_store=vector_store,
+              persist_dir=INDEX_DIR,
+          )
+          return load_index_from_storage(storage_context)
+
+      node_parser = SimpleNodeParser.from_defaults(
+          chunk_size=2048,  # Increase chunk size to ensure more content is read
+          chunk_overlap=100,  # Adjust overlap to ensure continuity
+      )
+      
+      reader = SimpleDirectoryReader(
+          input_dir=DATA_DIR,
+          recursive=True,
+          filename_as_id=True,
+          exclude=[f"*{suffix}" for suffix in CACHE_DB_SUFFIXES],
+      )
+      docs = reader.load_data()
+      
+      nodes = node_parser.get_nodes_from_documents(docs, show_progress=True)
+
+      # Unchanged chunks are served from the embedding cache, so a rebuild
+      # only pays for new or edited documents
+      embeddings = Settings.embed_model.get_text_embedding_batch(
+          [node.get_content(metadata_mode=MetadataMode.EMBED) for node in nodes],
+          show_progress=True,
+      )
+      for node, embedding in zip(nodes, embeddings):
+          node.embedding = embedding
+
+      # Approximate (HNSW) search over int8 vectors keeps queries fast and the
+      # index 4x smaller than float32; the quantizer learns per-dimension
+      # min/max from the corpus and stores them inside the FAISS index
+      faiss_index = faiss.IndexHNSWSQ(EMBED_DIM, faiss.ScalarQuantizer.QT_8bit, HNSW_M)
+      faiss_index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+      faiss_index.hnsw.efSearch = HNSW_EF_SEARCH
+      if embeddings:
+          faiss_index.train(np.asarray(embeddings, dtype=np.float32))
+      storage_context = StorageContext.from_defaults(
+          vector_store=FaissVectorStore(faiss_index=faiss_index)
+      )
+
+      index = VectorStoreIndex(
+          nodes,
+          storage_context=storage_context,
           show_progress=True
       )
+      index.storage_context.persist(persist_dir=INDEX_DIR)
+      # Written last: an interrupted build never looks current
+      with open(INDEX_MANIFEST, "w", encoding="utf-8") as f:
+          json.dump(manifest, f)
       return index
   except Exception as e:
       st.error(f"Error loading data: {e}")
@@ -154,12 +284,15 @@ for message in st.session_state.messages:
 if st.session_state.messages and st.session_state.messages[-1]["role"] != "assistant":
   with st.chat_message("assistant"):
       try:
-          # Get the complete response
-          response = st.session_state.chat_engine.chat(prompt)
-          formatted_response = format_response(response.response)
+          # Stream the response as it is generated
+          response_placeholder = st.empty()
+          with response_placeholder:
+              response = st.session_state.chat_engine.stream_chat(prompt)
+              response_text = st.write_stream(response.response_gen)
+          formatted_response = format_response(response_text)
           
-          # Display the complete response
-          st.markdown(formatted_response, unsafe_allow_html=True)
+          # Replace the raw stream with the formatted response
+          response_placeholder.markdown(formatted_response, unsafe_allow_html=True)
           
           # Append the response to the message history
           message = {
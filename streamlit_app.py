@@ -1,12 +1,26 @@
 import streamlit as st
 import fitz  # PyMuPDF
-from openai import OpenAI
+from openai import AsyncOpenAI, APIConnectionError, InternalServerError, RateLimitError
+import httpx
 import io
 import base64
 from PIL import Image
-import time
+import imagehash
+import numpy as np
+from turbojpeg import TurboJPEG, TJPF_RGB, TJFLAG_PROGRESSIVE
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 import os
+import time
+import random
+import hashlib
 import json
+import re
+import sqlite3
+import threading
+import unicodedata
+import ahocorasick
 from pathlib import Path
 
 # Set page configuration
@@ -16,143 +30,542 @@ st.set_page_config(
     layout="wide",
 )
 
-# Initialize OpenAI client
-client = OpenAI(api_key=st.secrets["OPENAI_API_KEY"])
-
-# Initialize session state
-if 'indexed_files' not in st.session_state:
-    st.session_state.indexed_files = {}
-if 'processed_cache' not in st.session_state:
-    st.session_state.processed_cache = {}
+# libjpeg-turbo encoder (SIMD DCT/colour conversion) for page images. It needs
+# the system libturbojpeg library; without it pages are encoded with Pillow.
+try:
+    jpeg_encoder = TurboJPEG()
+except (OSError, RuntimeError):
+    jpeg_encoder = None
 
 # Constants
 DATA_DIR = Path("data")
-CACHE_FILE = DATA_DIR / "processed_cache.json"
-
-def load_cache():
-    """Load processed results from cache file"""
-    if CACHE_FILE.exists():
-        with open(CACHE_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    return {}
-
-def save_cache():
-    """Save processed results to cache file"""
+CACHE_DB = DATA_DIR / "cache.db"
+MAX_IMAGE_EDGE = 2048  # longest side GPT-4 Vision consumes in high detail
+JPEG_QUALITY = 85
+PAGES_PER_CALL = 4  # pages sent as separate images in one vision request
+MAX_CONCURRENT_REQUESTS = 8  # keep concurrent vision calls within RPM limits
+STREAM_REFRESH_SECONDS = 0.1  # each refresh resends the whole partial answer
+MAX_RATE_LIMIT_RETRIES = 6
+RATE_LIMIT_RESET = re.compile(r'(\d+(?:\.\d+)?)(ms|s|m|h)')
+HTTP_LIMITS = httpx.Limits(max_connections=64, max_keepalive_connections=32)
+HTTP_TIMEOUT = httpx.Timeout(120.0, connect=10.0)
+GUJARATI_SCRIPT = re.compile(r'[\u0A80-\u0AFF]')
+WORD_SEPARATORS = re.compile(r'[\s\-\u2010-\u2015]')
+# The vowel sign િ must follow a consonant (or nukta) in logical order
+MISPLACED_I_SIGN = re.compile(r'(?<![\u0A95-\u0AB9\u0ABC])\u0ABF')
+PHASH_IMAGE_EDGE = 256  # longest side rendered for perceptual hashing
+PHASH_MAX_DISTANCE = 4  # bits that may differ for two pages with identical text to count as duplicates
+
+def hamming_distance(a, b):
+    """Number of differing bits between two 64-bit hashes stored as signed ints"""
+    return ((a ^ b) & 0xFFFFFFFFFFFFFFFF).bit_count()
+
+@st.cache_resource
+def get_cache_db():
+    """Open the SQLite page-result cache shared across reruns"""
     os.makedirs(DATA_DIR, exist_ok=True)
-    with open(CACHE_FILE, 'w', encoding='utf-8') as f:
-        json.dump(st.session_state.processed_cache, f, ensure_ascii=False, indent=2)
-
-def encode_image_to_base64(image):
-    """Convert PIL Image to base64 string"""
+    conn = sqlite3.connect(CACHE_DB, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    # Results are JSON lists of news items for one page
+    conn.execute("""CREATE TABLE IF NOT EXISTS page_items(
+        file_hash TEXT, tag TEXT, page INT, items TEXT,
+        PRIMARY KEY(file_hash, tag, page))""")
+    # A pHash mostly captures column layout, so duplicates also need the same
+    # text layer; text_hash is '' for scanned pages, which need an exact pHash
+    conn.execute("""CREATE TABLE IF NOT EXISTS duplicate_items(
+        hash INT, text_hash TEXT, tag TEXT, items TEXT,
+        PRIMARY KEY(tag, text_hash, hash))""")
+    conn.execute("""CREATE TABLE IF NOT EXISTS page_hashes(
+        file_hash TEXT, page INT, hash INT,
+        PRIMARY KEY(file_hash, page))""")
+    conn.create_function("hamming_distance", 2, hamming_distance, deterministic=True)
+    conn.commit()
+    return conn
+
+@st.cache_resource
+def get_cache_lock():
+    """Serializes use of the shared cache connection across session threads"""
+    return threading.Lock()
+
+@st.cache_data(show_spinner=False)
+def file_sha256(pdf_path, mtime):
+    """Hash PDF contents so cached results survive renames and moves"""
+    digest = hashlib.sha256()
+    with open(pdf_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def pdf_page_texts(pdf_path, mtime):
+    """Text layer of every page, parsed once per file version"""
+    with fitz.open(pdf_path) as doc:
+        return [page.get_text("text") for page in doc]
+
+def load_cached_pages(file_hash, tag):
+    """Return {page: items} for every page already processed for this tag"""
+    with get_cache_lock():
+        rows = get_cache_db().execute(
+            "SELECT page, items FROM page_items WHERE file_hash = ? AND tag = ?",
+            (file_hash, tag)).fetchall()
+    return {page: json.loads(items) for page, items in rows}
+
+def find_duplicate_page(phash, text_hash, tag):
+    """Return the items of a previously processed page with the same content, if any"""
+    if text_hash:
+        query = ("SELECT items FROM duplicate_items WHERE tag = ? AND text_hash = ?"
+                 " AND hamming_distance(hash, ?) <= ? LIMIT 1")
+        params = (tag, text_hash, phash, PHASH_MAX_DISTANCE)
+    else:
+        query = "SELECT items FROM duplicate_items WHERE tag = ? AND text_hash = '' AND hash = ?"
+        params = (tag, phash)
+    with get_cache_lock():
+        row = get_cache_db().execute(query, params).fetchone()
+    return json.loads(row[0]) if row else None
+
+def load_page_hashes(file_hash):
+    """Return {page: phash} for every page of this file hashed so far"""
+    with get_cache_lock():
+        rows = get_cache_db().execute(
+            "SELECT page, hash FROM page_hashes WHERE file_hash = ?", (file_hash,)).fetchall()
+    return dict(rows)
+
+def save_page_hashes(file_hash, hashes):
+    """Remember page pHashes so later searches need not render pages to dedupe them"""
+    conn = get_cache_db()
+    with get_cache_lock():
+        conn.executemany("INSERT OR REPLACE INTO page_hashes VALUES (?, ?, ?)",
+                         [(file_hash, page, phash) for page, phash in hashes.items()])
+        conn.commit()
+
+def save_cached_page(file_hash, tag, page, items, fingerprint=None):
+    """Store the news items found on a single processed page
+
+    fingerprint is (phash, text_hash) for pages the model actually read, making
+    them available for duplicate reuse.
+    """
+    conn = get_cache_db()
+    items = json.dumps(items, ensure_ascii=False)
+    with get_cache_lock():
+        conn.execute("INSERT OR REPLACE INTO page_items VALUES (?, ?, ?, ?)",
+                     (file_hash, tag, page, items))
+        if fingerprint is not None:
+            conn.execute("INSERT OR REPLACE INTO duplicate_items VALUES (?, ?, ?, ?)",
+                         (*fingerprint, tag, items))
+        conn.commit()
+
+@st.cache_resource
+def get_render_pool():
+    """Process pool shared across reruns for CPU-bound page rasterization"""
+    return ProcessPoolExecutor(max_workers=os.cpu_count())
+
+def encode_image_to_base64(image_bytes):
+    """Convert JPEG bytes to base64 string"""
+    return base64.b64encode(image_bytes).decode()
+
+def _render_pixmap(page, max_edge, zoom=2):
+    """Rasterize a PDF page to an RGB pixmap no longer than max_edge"""
+    zoom = min(zoom, max_edge / max(page.rect.width, page.rect.height))
+    return page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), colorspace=fitz.csRGB, alpha=False)
+
+def _encode_jpeg(pix):
+    """Encode an RGB pixmap as progressive JPEG bytes"""
+    if jpeg_encoder is not None:
+        # Hand the pixmap buffer to libjpeg-turbo without an intermediate copy
+        pixels = np.frombuffer(pix.samples_mv, np.uint8).reshape(pix.height, pix.width, pix.n)
+        return jpeg_encoder.encode(pixels, quality=JPEG_QUALITY,
+                                   pixel_format=TJPF_RGB, flags=TJFLAG_PROGRESSIVE)
+    image = Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
     buffered = io.BytesIO()
-    image.save(buffered, format="JPEG")
-    return base64.b64encode(buffered.getvalue()).decode()
-
-def convert_pdf_page_to_image(page):
-    """Convert a PDF page to PIL Image"""
-    pix = page.get_pixmap(matrix=fitz.Matrix(2, 2))
-    img_data = pix.tobytes("jpeg")
-    return Image.open(io.BytesIO(img_data))
-
-def process_image_with_gpt4_vision(image, tag):
-    """Process image using GPT-4 Vision API"""
+    image.save(buffered, format="JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+    return buffered.getvalue()
+
+def _phash(pix):
+    """Perceptual hash of an RGB pixmap as a signed 64-bit int"""
+    image = Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
+    value = int(str(imagehash.phash(image)), 16)
+    # SQLite integers are signed 64-bit
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+def _render_page(doc, idx, zoom=2):
+    """Render a single PDF page to JPEG bytes and its pHash"""
+    page = doc[idx]
+    # Never render beyond the resolution the vision model actually uses
+    jpeg = _encode_jpeg(_render_pixmap(page, MAX_IMAGE_EDGE, zoom))
+    # pHash only looks at a 32x32 thumbnail, so hash a small rendering
+    return jpeg, _phash(_render_pixmap(page, PHASH_IMAGE_EDGE, zoom))
+
+def _render_pages(pdf_path, pages, zoom=2):
+    """Render pages to JPEG bytes and pHashes (runs in a worker process)"""
+    with fitz.open(pdf_path) as doc:
+        rendered = [_render_page(doc, i, zoom) for i in pages]
+    return [jpeg for jpeg, _ in rendered], [phash for _, phash in rendered]
+
+def split_items_by_page(content, pages, tags):
+    """Parse a JSON multi-page response into {tag: {page_index: [news items]}}
+
+    Raises ValueError when an item cannot be attributed to one of the batch's
+    pages and tags, so the batch is retried rather than cached as "no news",
+    and when two tags fold to the same name and could not be told apart.
+    """
+    results = {tag: {i: [] for i in pages} for tag in tags}
+    tag_names = {fold_for_matching(tag): tag for tag in tags}
+    if len(tag_names) != len(tags):
+        raise ValueError(f"Tags must be distinct after folding case, spaces and hyphens: {tags!r}")
+    for item in json.loads(content).get("items", []):
+        if not isinstance(item, dict):
+            raise ValueError(f"Unexpected item in vision response: {item!r}")
+        tag = tags[0] if len(tags) == 1 else tag_names.get(fold_for_matching(str(item.get("tag") or "")))
+        # Accept 3, "3" and "Page 3"
+        number = re.search(r'\d+', str(item.get("page") or ""))
+        i = int(number.group()) - 1 if number else None
+        if i is None and len(pages) == 1:
+            i = pages[0]
+        if tag is None or i not in results[tag]:
+            raise ValueError(f"Could not attribute item to a page and tag: {item!r}")
+        results[tag][i].append({key: str(item.get(key) or "") for key in ("gu", "en", "summary")})
+    return results
+
+def page_text_hash(page_text):
+    """Hash of the normalized text layer, or '' when the page has none"""
+    text = normalize_text(page_text)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest() if text else ""
+
+def normalize_text(text):
+    """NFC-normalize and casefold text, dropping zero-width joiners and extra whitespace"""
+    text = unicodedata.normalize("NFC", text).casefold()
+    return " ".join(text.replace("\u200c", " ").replace("\u200d", "").split())
+
+def fold_for_matching(text):
+    """Normalize text and drop spaces and hyphens for tag matching"""
+    # Gujarati compounds are printed spaced, joined and hyphenated
+    # (ગાંધી નગર / ગાંધીનગર, કોવિડ-૧૯), so compare with all three folded away
+    return WORD_SEPARATORS.sub("", normalize_text(text))
+
+def text_layer_is_reliable(page_text):
+    """Whether the Gujarati text layer is stored in logical order"""
+    # Many Indic PDFs store the pre-base vowel sign િ in visual order, before
+    # its consonant; such text cannot be searched for tags reliably
+    vowel_signs = page_text.count("\u0ABF")
+    return vowel_signs == 0 or len(MISPLACED_I_SIGN.findall(page_text)) / vowel_signs < 0.1
+
+def is_checkable_tag(tag):
+    """Whether the text layer can rule a tag out (a Gujarati tag with something to match)"""
+    # English tags need translation, so only the vision model can look for them
+    return bool(GUJARATI_SCRIPT.search(tag)) and bool(fold_for_matching(tag))
+
+@st.cache_resource(show_spinner=False, max_entries=32)
+def build_tag_matcher(tags):
+    """Aho-Corasick automaton mapping every folded Gujarati tag to the tags it stands for"""
+    automaton = ahocorasick.Automaton()
+    for tag in tags:
+        if is_checkable_tag(tag):
+            folded = fold_for_matching(tag)
+            automaton.add_word(folded, automaton.get(folded, ()) + (tag,))
+    automaton.make_automaton()
+    return automaton
+
+def tags_page_may_mention(page_text, tags):
+    """Cheap text-layer check; the tags the page may mention, dropping those it lacks"""
+    # Scanned, legacy-font or visually ordered pages have no usable Gujarati
+    # text, so only a sound Gujarati text layer can rule tags out
+    if not GUJARATI_SCRIPT.search(page_text) or not text_layer_is_reliable(page_text):
+        return set(tags)
+    mentioned = {tag for tag in tags if not is_checkable_tag(tag)}
+    matcher = build_tag_matcher(tuple(tags))
+    if len(matcher):
+        for _, found in matcher.iter(fold_for_matching(page_text)):
+            mentioned.update(found)
+    return mentioned
+
+def parse_rate_limit_reset(value):
+    """Convert an x-ratelimit-reset-* header such as '6m0s' or '20ms' to seconds"""
+    units = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+    return sum(float(amount) * units[unit] for amount, unit in RATE_LIMIT_RESET.findall(value))
+
+class ResponseTruncated(Exception):
+    """The model hit max_tokens before finishing its JSON answer"""
+
+class RateLimiter:
+    """Hold back new requests while OpenAI reports the request quota as exhausted"""
+
+    def __init__(self):
+        self.resume_at = 0.0
+
+    async def wait(self):
+        while (delay := self.resume_at - time.monotonic()) > 0:
+            await asyncio.sleep(delay)
+
+    def pause(self, seconds):
+        self.resume_at = max(self.resume_at, time.monotonic() + seconds)
+
+    def update(self, headers):
+        if headers.get("x-ratelimit-remaining-requests") == "0":
+            self.pause(parse_rate_limit_reset(headers.get("x-ratelimit-reset-requests", "1s")))
+
+    def back_off(self, attempt):
+        self.pause(min(60, 2 ** attempt + random.random()))
+
+async def create_with_rate_limit(client, rate_limiter, **kwargs):
+    """Create a chat completion, honouring rate-limit headers and backing off on 429s
+
+    This is the only retry policy: the client is created with max_retries=0.
+    """
+    for attempt in range(MAX_RATE_LIMIT_RETRIES):
+        await rate_limiter.wait()
+        try:
+            raw_response = await client.chat.completions.with_raw_response.create(**kwargs)
+        except (RateLimitError, APIConnectionError, InternalServerError) as e:
+            # An exhausted quota is also a 429 but will never succeed on retry
+            if attempt == MAX_RATE_LIMIT_RETRIES - 1 or getattr(e, "code", None) == "insufficient_quota":
+                raise
+            rate_limiter.back_off(attempt)
+            continue
+        rate_limiter.update(raw_response.headers)
+        return raw_response.parse()
+
+async def process_image_with_gpt4_vision(client, rate_limiter, page_images, pages, tags, placeholder):
+    """Process page images using GPT-4 Vision API, streaming the answer into placeholder
+
+    Each page is its own image part so it keeps full resolution; all pages and
+    tags are answered in one call. Returns {tag: {page_index: [news items]}}
+    or None on failure.
+    """
     try:
-        base64_image = encode_image_to_base64(image)
+        page_parts = []
+        for i, image_bytes in zip(pages, page_images):
+            base64_image = await asyncio.to_thread(encode_image_to_base64, image_bytes)
+            page_parts += [
+                {"type": "text", "text": f"Page {i + 1}:"},
+                {
+                    "type": "image_url",
+                    "image_url": {
+                        "url": f"data:image/jpeg;base64,{base64_image}"
+                    }
+                }
+            ]
 
-        response = client.chat.completions.create(
+        response = await create_with_rate_limit(
+            client,
+            rate_limiter,
             model="gpt-4o-mini",
             messages=[
                 {
                     "role": "system",
-                    "content": """You are a Gujarati newspaper expert. Analyze the image, find all relevant news related to the given tag, 
+                    "content": """You are a Gujarati newspaper expert. You are given several newspaper page images, each
+                    preceded by its label "Page N". Analyze every page, find all relevant news related to each of the given tags,
                     and provide the following for each news item:
                     1. The original Gujarati text
                     2. English translation
                     3. Detailed summary
-                    Format as:
-                    [Original Gujarati Text]
-                    [English Translation]
-                    [Brief Summary]
-                    ---"""
+                    Respond with JSON only, in the form:
+                    {"items": [{"tag": "matching tag", "page": N, "gu": "original Gujarati text", "en": "English translation", "summary": "summary"}]}
+                    where "tag" is copied exactly from the given list and N is the label of the page the item appears on.
+                    List an item once per tag it is relevant to. Use {"items": []} if nothing is relevant."""
                 },
                 {
                     "role": "user",
                     "content": [
-                        {"type": "text", "text": f"Find all news related to '{tag}' in this newspaper image. Extract and translate the relevant text."},
-                        {
-                            "type": "image_url",
-                            "image_url": {
-                                "url": f"data:image/jpeg;base64,{base64_image}"
-                            }
-                        }
+                        {"type": "text", "text": f"Find all news related to each of these tags: {json.dumps(tags, ensure_ascii=False)} on pages {', '.join(str(i + 1) for i in pages)} of this newspaper. Extract and translate the relevant text."},
+                        *page_parts
                     ]
                 }
             ],
-            max_tokens=4096
+            max_tokens=4096,
+            response_format={"type": "json_object"},
+            stream=True
         )
-        return response.choices[0].message.content
+        content = ""
+        refreshed_at = 0.0
+        finish_reason = None
+        async for chunk in response:
+            if not chunk.choices:
+                continue
+            choice = chunk.choices[0]
+            finish_reason = choice.finish_reason or finish_reason
+            if choice.delta.content:
+                content += choice.delta.content
+                if time.monotonic() - refreshed_at >= STREAM_REFRESH_SECONDS:
+                    placeholder.code(content, language="json")
+                    refreshed_at = time.monotonic()
+        if finish_reason == "length":
+            raise ResponseTruncated()
+        return split_items_by_page(content, pages, tags)
+    except ResponseTruncated:
+        raise
     except Exception as e:
         st.error(f"Error in GPT-4 Vision processing: {str(e)}")
         return None
 
+@st.cache_resource(show_spinner="Indexing PDF files...")
+def _scan_pdf_files(dir_mtime):
+    """Map PDF file names to paths; shared by all sessions until the directory changes"""
+    return {pdf_path.name: str(pdf_path) for pdf_path in sorted(DATA_DIR.glob("*.pdf"))}
+
 def index_pdf_files():
-    """Index all PDF files in the data directory at startup"""
+    """Index all PDF files in the data directory"""
     if not DATA_DIR.exists():
         os.makedirs(DATA_DIR)
-        return
-
-    pdf_files = list(DATA_DIR.glob("*.pdf"))
-    with st.spinner("Indexing PDF files..."):
-        for pdf_path in pdf_files:
-            if pdf_path.name not in st.session_state.indexed_files:
-                st.session_state.indexed_files[pdf_path.name] = str(pdf_path)
-
-def process_pdf(pdf_path, tag, progress_bar):
-    """Process PDF using PyMuPDF and GPT-4 Vision"""
+    return _scan_pdf_files(DATA_DIR.stat().st_mtime)
+
+async def _process_all(pdf_path, file_hash, page_tags, text_hashes, progress_bar):
+    """Render page batches in the process pool and stream them through a bounded queue to GPT-4 Vision
+
+    page_tags maps each pending page to the tags it still needs; only those
+    are asked for and stored, so cached rows for other tags are left alone.
+    """
+    loop = asyncio.get_running_loop()
+    pool = get_render_pool()
+    all_tags = list(dict.fromkeys(tag for tags in page_tags.values() for tag in tags))
+    page_results = {tag: {} for tag in all_tags}
+    hashes = load_page_hashes(file_hash)
+
+    def reuse_duplicate(i):
+        """Reuse a same-content page's items when every tag it needs has them"""
+        duplicates = {tag: find_duplicate_page(hashes[i], text_hashes[i], tag) for tag in page_tags[i]}
+        if any(items is None for items in duplicates.values()):
+            return False
+        for tag, items in duplicates.items():
+            page_results[tag][i] = items
+            save_cached_page(file_hash, tag, i, items)
+        return True
+
+    # Pages hashed on an earlier search can be deduplicated without rendering
+    reused = {i for i in page_tags if i in hashes and reuse_duplicate(i)}
+    pages = [i for i in page_tags if i not in reused]
+    if not pages:
+        return page_results
+
+    # Every tag adds items to the JSON answer, so fewer pages fit in max_tokens
+    pages_per_call = max(1, PAGES_PER_CALL // len(all_tags))
+    batches = [pages[n:n + pages_per_call] for n in range(0, len(pages), pages_per_call)]
+    workers = min(MAX_CONCURRENT_REQUESTS, len(batches))
+    # Bounded queue of pending renders: at most 2 * workers batches wait in memory
+    queue = asyncio.Queue(maxsize=2 * workers)
+    rate_limiter = RateLimiter()
+    done = 0
+    live_output = st.container()
+
+    async def produce():
+        for n, batch in enumerate(batches):
+            await queue.put((n, loop.run_in_executor(pool, _render_pages, pdf_path, batch)))
+        for _ in range(workers):
+            await queue.put(None)
+
+    async def read(client, unread, tags):
+        """Ask about [(page, image)] for tags, halving the request if the answer is truncated"""
+        placeholder = live_output.empty()
+        try:
+            return await process_image_with_gpt4_vision(
+                client, rate_limiter, [image for _, image in unread],
+                [i for i, _ in unread], tags, placeholder)
+        except ResponseTruncated:
+            pass
+        finally:
+            # Clear the raw stream; formatted results are shown once the file is done
+            placeholder.empty()
+
+        if len(unread) > 1:
+            mid = len(unread) // 2
+            parts = [(unread[:mid], tags), (unread[mid:], tags)]
+        elif len(tags) > 1:
+            mid = len(tags) // 2
+            parts = [(unread, tags[:mid]), (unread, tags[mid:])]
+        else:
+            st.error(f"GPT-4 Vision answer for page {unread[0][0] + 1} was too long and got cut off.")
+            return None
+        merged = {}
+        for part in parts:
+            for tag, tag_results in (await read(client, *part) or {}).items():
+                merged.setdefault(tag, {}).update(tag_results)
+        return merged
+
+    async def consume(client):
+        nonlocal done
+        while (item := await queue.get()) is not None:
+            n, render = item
+            page_images, page_hashes = await render
+            batch = batches[n]
+            hashes.update(zip(batch, page_hashes))
+            save_page_hashes(file_hash, dict(zip(batch, page_hashes)))
+            if n == 0:
+                st.image(page_images[0], caption=f"Processing Page {batch[0] + 1}",
+                         use_column_width=True)
+            # Newly hashed pages may duplicate ones processed before
+            unread = [(i, image) for i, image in zip(batch, page_images) if not reuse_duplicate(i)]
+            if unread:
+                tags = [tag for tag in all_tags if any(tag in page_tags[i] for i, _ in unread)]
+                result = await read(client, unread, tags)
+                for tag, tag_results in (result or {}).items():
+                    for i, items in tag_results.items():
+                        if tag in page_tags[i]:
+                            page_results[tag][i] = items
+                            save_cached_page(file_hash, tag, i, items, (hashes[i], text_hashes[i]))
+            done += len(batch)
+            progress_bar.progress(done / len(pages),
+                              f"Processed page {done} of {len(pages)}")
+
+    # One HTTP/2 connection pool multiplexes all concurrent vision calls
+    async with httpx.AsyncClient(http2=True, limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT) as http_client, \
+            AsyncOpenAI(api_key=st.secrets["OPENAI_API_KEY"], http_client=http_client,
+                        max_retries=0) as client:
+        await asyncio.gather(produce(), *(consume(client) for _ in range(workers)))
+
+    return page_results
+
+def collect_items(page_results):
+    """Flatten {page_index: items} in page order, showing each story once"""
+    # The same story often appears on several pages
+    items, seen = [], set()
+    for i in sorted(page_results):
+        for item in page_results[i]:
+            key = normalize_text(item["gu"])
+            if not key or key not in seen:
+                seen.add(key)
+                items.append({**item, "page": i + 1})
+    return items
+
+def process_pdf(pdf_path, tags, progress_bar):
+    """Process PDF using PyMuPDF and GPT-4 Vision; returns {tag: [news items]}"""
     try:
-        # Check if results are already cached
-        cache_key = f"{pdf_path}_{tag}"
-        if cache_key in st.session_state.processed_cache:
-            return st.session_state.processed_cache[cache_key]
-
-        doc = fitz.open(pdf_path)
-        all_results = []
-        total_pages = len(doc)
-
-        for i, page in enumerate(doc):
-            progress_bar.progress((i + 1) / total_pages,
-                              f"Processing page {i + 1} of {total_pages}")
-
-            image = convert_pdf_page_to_image(page)
-
-            if i == 0:
-                st.image(image, caption=f"Processing Page {i+1}", use_column_width=True)
-
-            result = process_image_with_gpt4_vision(image, tag)
-            if result:
-                all_results.append(result)
-
-            time.sleep(1)
-
-        doc.close()
-
-        # Cache the results
-        final_result = "\n".join(all_results)
-        st.session_state.processed_cache[cache_key] = final_result
-        save_cache()
-
-        return final_result
+        # Reuse any pages already processed for this file and each tag
+        mtime = os.path.getmtime(pdf_path)
+        file_hash = file_sha256(pdf_path, mtime)
+        page_results = {tag: load_cached_pages(file_hash, tag) for tag in tags}
+
+        # Tags still needing each page; one vision pass answers all of them
+        page_texts = pdf_page_texts(pdf_path, mtime)
+        pending_tags = {}
+        for i, page_text in enumerate(page_texts):
+            page_tags = [tag for tag in tags if i not in page_results[tag]]
+            if page_tags:
+                mentioned = tags_page_may_mention(page_text, tags)
+                page_tags = [tag for tag in page_tags if tag in mentioned]
+            if page_tags:
+                pending_tags[i] = page_tags
+        if pending_tags:
+            text_hashes = {i: page_text_hash(page_texts[i]) for i in pending_tags}
+            new_results = asyncio.run(_process_all(
+                str(pdf_path), file_hash, pending_tags, text_hashes, progress_bar))
+            for tag, tag_results in new_results.items():
+                page_results[tag].update(tag_results)
+
+        return {tag: collect_items(page_results[tag]) for tag in tags}
+
+    except BrokenProcessPool:
+        # A worker died (e.g. MuPDF crashed on this file or was OOM-killed);
+        # start a fresh pool for later searches and fail only this file
+        get_render_pool.clear()
+        st.error("Rendering crashed while processing this PDF. Pages finished so far are cached; please try again.")
+        return None
 
     except Exception as e:
         st.error(f"Error in PDF processing: {str(e)}")
         return None
 
 def main():
-    # Load cache at startup
-    st.session_state.processed_cache = load_cache()
-
     # Index PDF files at startup
-    index_pdf_files()
+    indexed_files = index_pdf_files()
 
     st.title("ગુજરાતી સમાચાર શોધક (Gujarati News Finder)")
     st.write("Search through indexed Gujarati newspapers")
@@ -161,43 +574,53 @@ def main():
     st.sidebar.header("Indexed Files")
     selected_files = st.sidebar.multiselect(
         "Select files to search",
-        options=list(st.session_state.indexed_files.keys())
+        options=list(indexed_files.keys())
     )
 
     # Tag input
-    search_tag = st.text_input(
-        "Enter search tag",
-        placeholder="Enter topic in English or Gujarati",
-        help="Enter the topic you want to search for in the newspapers"
+    search_input = st.text_area(
+        "Enter search tags",
+        placeholder="Enter comma-separated topics in English or Gujarati",
+        help="Enter one or more topics to search for in the newspapers; all tags are searched in a single pass"
     )
+    # Tags differing only in case, spacing or hyphens are the same tag to the
+    # model's answers, so keep the first spelling of each
+    unique_tags = {}
+    for tag in search_input.split(","):
+        if fold_for_matching(tag):
+            unique_tags.setdefault(fold_for_matching(tag), tag.strip())
+    search_tags = list(unique_tags.values())
 
     # Process button
     if st.button("Search Newspapers 📰", key="process_btn"):
         if not selected_files:
             st.error("Please select at least one file!")
             return
-        if not search_tag:
-            st.error("Please enter a search tag!")
+        if not search_tags:
+            st.error("Please enter at least one search tag!")
             return
 
         try:
             for filename in selected_files:
-                pdf_path = st.session_state.indexed_files[filename]
+                pdf_path = indexed_files[filename]
                 st.markdown(f"### Processing file: {filename}")
                 progress_bar = st.progress(0, f"Starting processing for {filename}...")
 
-                results = process_pdf(pdf_path, search_tag, progress_bar)
+                results = process_pdf(pdf_path, search_tags, progress_bar)
 
-                if results:
+                if results and any(results.values()):
                     st.success(f"Processing complete for {filename}!")
-                    st.markdown("### 🔍 Search Results")
 
-                    sections = results.split('---')
-                    for idx, section in enumerate(sections, 1):
-                        if section.strip():
+                    for tag, items in results.items():
+                        st.markdown(f"### 🔍 Search Results: {tag}")
+                        if not items:
+                            st.info(f"No relevant news found for '{tag}'.")
+                        for idx, item in enumerate(items, 1):
                             with st.container():
-                                st.markdown(f"#### News Item {idx}")
-                                st.markdown(section.strip())
+                                st.markdown(f"#### News Item {idx} (Page {item['page']})")
+                                st.markdown(item["gu"])
+                                st.markdown(f"**Translation:** {item['en']}")
+                                st.markdown(f"**Summary:** {item['summary']}")
                                 st.markdown("---")
                 else:
                     st.error(f"No relevant news found in {filename}.")
@@ -209,7 +632,7 @@ def main():
     with st.expander("ℹ️ How to use"):
         st.markdown("""
         1. **Select Files**: Choose files from the sidebar
-        2. **Enter Tag**: Type the topic you want to search for
+        2. **Enter Tags**: Type one or more topics, separated by commas
         3. **Search**: Click 'Search Newspapers' button
         4. **View Results**: See original text, translation, and summary
 